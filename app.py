@@ -1,10 +1,18 @@
 import streamlit as st
+import atexit
 import os
 import time
 import datetime
-import requests
+import functools
+import logging
+import queue
+import random
+import string
+import threading
+import hashlib
+import html
+import importlib.util
 import json
-from functools import lru_cache
 import datetime as _dt
 from pathlib import Path
 from vibe.config import settings as vibe_settings
@@ -13,11 +21,9 @@ from vibe import clients as vibe_clients
 OFFLINE_MODE = False
 genai_available = False
 genai = None
-from pymongo import MongoClient
-import base64
+from bson import ObjectId
 import uuid
 import streamlit.components.v1 as components
-from io import BytesIO
 from typing import Optional
 
 # --- Page Config MUST BE FIRST ---
@@ -38,26 +44,34 @@ _persisted = _read_persisted_offline()
 if 'OFFLINE_MODE' not in st.session_state:
     st.session_state['OFFLINE_MODE'] = _persisted if _persisted is not None else False
 
-# --- Try importing new google.genai client ---
-# Be permissive here so the app can run in offline / degraded mode.
+# Per-session defaults, initialized once here rather than guarded at each use
+DRAGON_GREETING = "By the ancient fire of code dragons 🐉 I greet you, Developer! 🔥 What knowledge shall we forge today? 💻 #DragonWisdom"
+for _key, _default in {
+    # Each message carries its emoji-formatted "html", computed once on append
+    "messages": [{"role": "assistant", "content": DRAGON_GREETING,
+                  "html": vibe_utils.format_emojis(DRAGON_GREETING)}],
+    "show_tale_modal": False,
+    "temp_tales": [],
+    "temp_comments": [],
+    "playground_prompt": '',
+    "playground_code": '',
+    "playground_lang": 'html',
+}.items():
+    st.session_state.setdefault(_key, _default)
+
+# --- Check for the optional google.generativeai client ---
+# Be permissive here so the app can run in offline / degraded mode. Only
+# check that it is installed: importing it pulls in grpc/protobuf (seconds
+# on a cold start), so the import is deferred to vibe.clients.init_genai,
+# which runs only when a GEMINI_API_KEY is configured.
 genai = None
-genai_available = False
 try:
-    import google.generativeai as genai  # optional
-    genai_available = True
+    genai_available = importlib.util.find_spec("google.generativeai") is not None
 except Exception:
-    genai = None
     genai_available = False
 
-try:
-    from dotenv import load_dotenv
-except Exception:
-    # Allow running without python-dotenv installed in lightweight/dev environments
-    def load_dotenv():
-        return None
-
 # --- Configuration ---
-load_dotenv()
+# .env is loaded once by vibe.config on import.
 
 # Safe rerun helper: some Streamlit versions don't provide experimental_rerun
 def safe_rerun():
@@ -74,17 +88,17 @@ def safe_rerun():
 
 # Lightweight code runner used by the playground
 def _run_code_safely(code: str, lang: str = "python", timeout: int = 5):
-    import subprocess, tempfile, sys
+    import subprocess, sys
     if lang != "python":
         return {"success": False, "stdout": "", "stderr": f"Unsupported language: {lang}"}
 
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as tf:
-        tf.write(code)
-        tf.flush()
-        tmp_path = tf.name
-
     try:
-        proc = subprocess.run([sys.executable, tmp_path], capture_output=True, text=True, timeout=timeout)
+        # Code goes in on stdin, so there's no temp file to write (or leak).
+        # -P keeps the app directory off sys.path; before 3.11 only -I does
+        # that, which also ignores PYTHON* env vars and user site-packages.
+        no_cwd = "-P" if sys.version_info >= (3, 11) else "-I"
+        proc = subprocess.run([sys.executable, no_cwd, "-"], input=code, capture_output=True, text=True,
+                              timeout=timeout)
         return {"success": proc.returncode == 0, "stdout": proc.stdout, "stderr": proc.stderr}
     except subprocess.TimeoutExpired:
         return {"success": False, "stdout": "", "stderr": f"Timeout after {timeout}s"}
@@ -99,6 +113,19 @@ def _sanitize_and_validate_code(code: str, lang: str = 'python') -> str:
     except Exception:
         return ''
 
+
+# Re-clicking Generate usually returns the cached LLM reply, so the
+# sanitize/compile-retry pass is memoized on a digest of that reply too.
+@st.cache_data(max_entries=128, show_spinner=False)
+def _process_generated(gen_key: str, _gen: str, prompt_text: str, lang: str) -> str:
+    return vibe_utils.process_generated_code(_gen, prompt_text, lang=lang)
+
+
+def _process_generated_code(gen: str, prompt_text: str, lang: str) -> str:
+    gen_key = hashlib.blake2b(str(gen or '').encode('utf-8', 'ignore'), digest_size=16).hexdigest()
+    return _process_generated(gen_key, gen, prompt_text, lang)
+
+
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 MONGO_URI = os.getenv("MONGO_URI")
 
@@ -147,34 +174,160 @@ if st.session_state.get('OFFLINE_MODE'):
     _render_offline_icon()
 
 # Try to configure the Gemini client only when available and we have a key.
+# The model is built once per process and reused by every request.
+@st.cache_resource(show_spinner=False)
+def _get_gemini_model(system_instruction: Optional[str] = None):
+    return vibe_clients.create_gemini_model(GEMINI_API_KEY, system_instruction=system_instruction)
+
+
+gemini_model = None
 if GEMINI_API_KEY:
-    ok = vibe_clients.init_genai(GEMINI_API_KEY)
-    if ok:
+    gemini_model = _get_gemini_model()
+    if gemini_model is not None:
         genai_available = True
     else:
         OFFLINE_MODE = True
         st.warning("Failed to initialize Gemini Client: initialization error. LLM disabled.")
 
 # MongoDB connection
+# Streamlit reruns this script on every interaction, so the client and its
+# connection pool are cached once per process and shared across sessions.
+# Reachability is re-checked at most every MONGO_PING_TTL seconds, so the
+# app picks Mongo back up after an outage without a restart.
+MONGO_PING_TTL = 30  # seconds
+
+
+def _ensure_indexes(chats, comments, tales):
+    # One create_indexes command per collection instead of one round trip
+    # per index; create_indexes is a no-op for indexes that already exist.
+    from pymongo import IndexModel
+    try:
+        # Every chat document carries its session_id; the compound index
+        # serves "latest turns of one session" without a collection scan.
+        chats.create_indexes([IndexModel([("timestamp", -1)]),
+                              IndexModel([("session_id", 1), ("timestamp", -1)])])
+        comments.create_index([("timestamp", -1)])
+        # A collection holds a single text index; replace the old title-only one
+        # so searches match tale content as well.
+        if "title_text" in tales.index_information():
+            tales.drop_index("title_text")
+        # Compound indexes cover the rating filter plus either sort order.
+        tales.create_indexes([
+            IndexModel([("rating", -1), ("timestamp", -1)]),
+            IndexModel([("timestamp", -1)]),
+            IndexModel([("title", "text"), ("content", "text")], weights={"title": 10, "content": 1}),
+        ])
+    except Exception as err:
+        logging.getLogger(__name__).warning("Dragon hoard index setup failed: %s", err)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_mongo():
+    """Return (client, chats, comments, tales); all None when Mongo isn't configured."""
+    client = vibe_clients.create_mongo_client()
+    if client is None:
+        return None, None, None, None
+    db = client.get_database('chatbotDB')
+    return client, db.get_collection('chats'), db.get_collection('comments'), db.get_collection('tales')
+
+
+@st.cache_data(ttl=MONGO_PING_TTL, show_spinner=False)
+def _mongo_reachable(_client) -> bool:
+    try:
+        _client.admin.command("ping")
+        return True
+    except Exception:
+        return False
+
+
+@st.cache_resource(show_spinner=False)
+def _start_index_build(_chats, _comments, _tales) -> bool:
+    # Once per process, after the first successful ping; off the render path.
+    threading.Thread(target=_ensure_indexes, args=(_chats, _comments, _tales), daemon=True,
+                     name="dragon-indexes").start()
+    return True
+
+
 mongo_client = None
 collection = None
 comments_collection = None
 tales_collection = None
-mongo_client = vibe_clients.create_mongo_client()
-if mongo_client is not None:
+try:
+    mongo_client, collection, comments_collection, tales_collection = _get_mongo()
+    if mongo_client is not None and _mongo_reachable(mongo_client):
+        _start_index_build(collection, comments_collection, tales_collection)
+    else:
+        mongo_client = collection = comments_collection = tales_collection = None
+        st.warning("MongoDB not configured or unreachable. Data will only persist in this session.")
+except Exception as e:
+    st.warning(f"Couldn't configure MongoDB collections: {str(e)}. Data will only persist in this session.")
+
+
+# Chat history writes are fire-and-forget so the reply is not held up by a
+# MongoDB round trip. Turns from all sessions are queued and a single daemon
+# thread flushes them with insert_many, up to CHAT_FLUSH_MAX per batch.
+CHAT_FLUSH_MAX = 50
+CHAT_FLUSH_INTERVAL = 1.0  # seconds
+
+
+def _drain(pending, max_n: int, timeout: float) -> list:
+    """Block up to `timeout` for a first item, then take whatever else is queued."""
     try:
-        db = mongo_client.get_database('chatbotDB')
-        collection = db.get_collection('chats')
-        comments_collection = db.get_collection('comments')
-        tales_collection = db.get_collection('tales')
-        collection.create_index([("timestamp", -1)])
-        comments_collection.create_index([("timestamp", -1)])
-        tales_collection.create_index([("rating", -1)])
-        tales_collection.create_index([("title", "text")])
-    except Exception as e:
-        st.warning(f"Couldn't configure MongoDB collections: {str(e)}. Data will only persist in this session.")
-else:
-    st.warning("MongoDB not configured or unreachable. Data will only persist in this session.")
+        items = [pending.get(timeout=timeout)]
+    except queue.Empty:
+        return []
+    while len(items) < max_n:
+        try:
+            items.append(pending.get_nowait())
+        except queue.Empty:
+            break
+    return items
+
+
+@st.cache_resource(show_spinner=False)
+def _chat_log_queue(_chats):
+    pending = queue.Queue()
+
+    def _flush(items):
+        try:
+            # unordered: one bad document doesn't abort the rest of the batch
+            _chats.insert_many(items, ordered=False)
+        except Exception as err:
+            _log_write_error(err)
+
+    def _flush_forever():
+        while True:
+            items = _drain(pending, CHAT_FLUSH_MAX, CHAT_FLUSH_INTERVAL)
+            if items:
+                _flush(items)
+
+    def _flush_remaining():
+        # the flusher is a daemon thread, so write out whatever is still
+        # queued when the server shuts down instead of dropping it
+        while items := _drain(pending, CHAT_FLUSH_MAX, 0):
+            _flush(items)
+
+    threading.Thread(target=_flush_forever, daemon=True, name="dragon-db").start()
+    atexit.register(_flush_remaining)
+    return pending
+
+
+# Every Gemini call carries LLM_TIMEOUT as its client-side deadline, so a
+# stalled RPC returns with an error instead of pinning a thread. Blocking
+# and streaming calls share one budget of LLM_MAX_CONCURRENCY in-flight
+# requests per process.
+LLM_TIMEOUT = 60  # seconds
+LLM_MAX_CONCURRENCY = 8
+LLM_REQUEST_OPTIONS = {"timeout": LLM_TIMEOUT}
+
+
+@st.cache_resource(show_spinner=False)
+def _llm_slots():
+    return threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+
+def _log_write_error(err):
+    logging.getLogger(__name__).warning("Dragon hoard write failed: %s", err)
 
 # --- Custom system prompt with Dragon Developer theme ---
 your_style_prompt = """
@@ -191,241 +344,12 @@ Example style:
 """
 
 # --- Enhanced Dragon Developer CSS with Floating Dragon ---
-st.markdown("""
-<style>
-    /* Main container */
-    .stApp {
-        background: linear-gradient(135deg, #0a0000 0%, #1a0500 100%);
-        font-family: 'Poppins', 'Arial', sans-serif;
-        overflow-x: hidden;
-    }
-    
-    /* Dragon scale pattern */
-    .dragon-bg {
-        position: fixed;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        background-image: radial-gradient(circle, #ff550055 1px, transparent 1px);
-        background-size: 30px 30px;
-        z-index: -2;
-        pointer-events: none;
-    }
-    
-    /* Floating Dragon Animation */
-    .floating-dragon {
-        position: fixed;
-        width: 200px;
-        height: 200px;
-        z-index: -1;
-        pointer-events: none;
-        animation: float-dragon 25s linear infinite;
-        opacity: 0.7;
-        filter: drop-shadow(0 0 15px rgba(255, 100, 0, 0.8));
-    }
-    
-    @keyframes float-dragon {
-        0% { transform: translate(-200px, 100px) scale(0.8); }
-        25% { transform: translate(25vw, 50px) scale(1); }
-        50% { transform: translate(50vw, 150px) scale(0.9); }
-        75% { transform: translate(75vw, 50px) scale(1.1); }
-        100% { transform: translate(100vw, 100px) scale(0.8); }
-    }
-    
-    /* Enhanced fiery emoji effect */
-    .dragon-emoji {
-        filter: drop-shadow(0 0 12px rgba(255, 100, 0, 0.9));
-        animation: flame-pulse 1s infinite alternate;
-        transform: scale(1.2);
-        display: inline-block;
-        transition: all 0.3s ease;
-    }
-    
-    @keyframes flame-pulse {
-        0% { transform: scale(1.2); filter: drop-shadow(0 0 12px rgba(255, 100, 0, 0.9)); }
-        100% { transform: scale(1.4); filter: drop-shadow(0 0 18px rgba(255, 150, 0, 1)); }
-    }
-    
-    /* Enhanced code emoji effect */
-    .code-emoji {
-        filter: drop-shadow(0 0 10px rgba(0, 200, 255, 0.8));
-        animation: code-pulse 1.5s infinite alternate;
-        transform: scale(1.2);
-        display: inline-block;
-        transition: all 0.3s ease;
-    }
-    
-    @keyframes code-pulse {
-        0% { transform: scale(1.2); filter: drop-shadow(0 0 10px rgba(0, 200, 255, 0.8)); }
-        100% { transform: scale(1.4); filter: drop-shadow(0 0 15px rgba(0, 220, 255, 1)); }
-    }
-    
-    /* Enhanced header styles */
-    .header {
-        background: linear-gradient(90deg, #8b0000, #ff4500);
-        color: #ffd700;
-        padding: 1.8rem;
-        border-radius: 0 0 15px 15px;
-        box-shadow: 0 8px 25px rgba(255, 69, 0, 0.6);
-        margin-bottom: 2.5rem;
-        position: relative;
-        overflow: hidden;
-        border-bottom: 4px solid #ffd700;
-        font-family: 'Cinzel Decorative', cursive;
-    }
-    
-    .header::before {
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 5px;
-        background: linear-gradient(90deg, #ff8c00, #ff4500, #ff8c00);
-        animation: flame-flow 2s linear infinite;
-        background-size: 200% 100%;
-    }
-    
-    @keyframes flame-flow {
-        0% { background-position: 0% 50%; }
-        100% { background-position: 200% 50%; }
-    }
-    
-    /* Enhanced dragon card */
-    .dragon-card {
-        background: rgba(20, 5, 0, 0.85);
-        border: 3px solid #ff8c00;
-        border-radius: 18px;
-        padding: 2rem;
-        margin: 2.5rem 0;
-        box-shadow: 0 12px 35px rgba(255, 69, 0, 0.5);
-        transition: all 0.4s cubic-bezier(0.175, 0.885, 0.32, 1.275);
-        backdrop-filter: blur(6px);
-        position: relative;
-        overflow: hidden;
-        transform-style: preserve-3d;
-    }
-    
-    .dragon-card::after {
-        content: "";
-        position: absolute;
-        top: -50%;
-        left: -50%;
-        width: 200%;
-        height: 200%;
-        background: linear-gradient(
-            to bottom right,
-            transparent 45%,
-            #ff450044 50%,
-            transparent 55%
-        );
-        animation: dragon-shine 3s linear infinite;
-    }
-    
-    @keyframes dragon-shine {
-        0% { transform: translate(-30%, -30%) rotate(0deg); }
-        100% { transform: translate(30%, 30%) rotate(360deg); }
-    }
-    
-    .dragon-card:hover {
-        transform: translateY(-8px) rotate(1deg);
-        box-shadow: 0 18px 45px rgba(255, 100, 0, 0.8);
-    }
-    
-    /* Badge styles */
-    .badge {
-        display: inline-block;
-        padding: 5px 10px;
-        border-radius: 15px;
-        margin: 5px;
-        font-size: 0.8rem;
-        font-weight: bold;
-        background: linear-gradient(135deg, #ff8c00, #ff4500);
-        color: #ffd700;
-        box-shadow: 0 4px 15px rgba(255, 69, 0, 0.5);
-    }
-    
-    /* Challenge card */
-    .challenge-card {
-        background: rgba(30, 10, 0, 0.9);
-        border: 2px solid #ff8c00;
-        border-radius: 15px;
-        padding: 15px;
-        margin: 10px 0;
-        transition: all 0.3s ease;
-    }
-    
-    .challenge-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 10px 25px rgba(255, 100, 0, 0.6);
-    }
-    
-    /* Progress bar */
-    .progress-container {
-        width: 100%;
-        background-color: rgba(30, 10, 0, 0.7);
-        border-radius: 10px;
-        margin: 10px 0;
-    }
-    
-    .progress-bar {
-        height: 20px;
-        border-radius: 10px;
-        background: linear-gradient(90deg, #ff8c00, #ff4500);
-        text-align: center;
-        line-height: 20px;
-        color: white;
-        transition: width 0.5s ease;
-    }
-    
-    /* Typewriter effect */
-    .typewriter {
-        display: inline-block;
-    }
-    
-    .typewriter-text {
-        display: inline-block;
-        overflow: hidden;
-        border-right: 2px solid #ff8c00;
-        white-space: nowrap;
-        margin: 0;
-        animation: typing 0.1s steps(1, end), blink-caret 0.75s step-end infinite;
-    }
-    
-    @keyframes typing {
-        from { width: 0 }
-        to { width: 100% }
-    }
-    
-    @keyframes blink-caret {
-        from, to { border-color: transparent }
-        50% { border-color: #ff8c00; }
-    }
-    
-    /* Tavern comment styles */
-    .tavern-comment {
-        background: rgba(30, 10, 0, 0.5);
-        border-left: 3px solid #ff8c00;
-        padding: 10px;
-        margin: 5px 0;
-        border-radius: 0 8px 8px 0;
-    }
-    
-    .tavern-comment-text {
-        color: #ffd700;
-        margin: 0;
-        font-size: 0.9rem;
-    }
-    
-    .tavern-comment-meta {
-        color: #ff8c00;
-        margin: 0;
-        font-size: 0.7rem;
-        text-align: right;
-    }
-</style>
-
+# The stylesheet lives in assets/dragon.css; it and the floating-dragon markup
+# are assembled once per process and sent as a single markdown element.
+# The Lottie player comes from jsDelivr pinned to a major version rather
+# than unpkg's "@latest" redirect, which browsers can't cache.
+_FLOATING_DRAGON = """
+<link rel="preconnect" href="https://cdn.jsdelivr.net" crossorigin>
 <div class="dragon-bg"></div>
 <div class="floating-dragon">
     <lottie-player 
@@ -438,52 +362,193 @@ st.markdown("""
     </lottie-player>
 </div>
 
-<script src="https://unpkg.com/@lottiefiles/lottie-player@latest/dist/lottie-player.js"></script>
-""", unsafe_allow_html=True)
+<script src="https://cdn.jsdelivr.net/npm/@lottiefiles/lottie-player@2/dist/lottie-player.js"></script>
+"""
+
+
+@st.cache_data(show_spinner=False)
+def _dragon_css() -> str:
+    css = (Path(__file__).parent / "assets" / "dragon.css").read_text(encoding="utf-8")
+    return f"<style>\n{css}</style>\n{_FLOATING_DRAGON}"
+
+
+st.markdown(_dragon_css(), unsafe_allow_html=True)
 
 # Rate limiting variables and LLM responder moved above the playground so UI
 # callbacks can call it during the same Streamlit run.
-LAST_REQUEST_TIME = 0
+# Token bucket per session: bursts of up to REQUEST_BURST requests, refilled
+# at one token every MIN_REQUEST_INTERVAL seconds.
 MIN_REQUEST_INTERVAL = 1.2  # seconds
+REQUEST_BURST = 3
+# Only the most recent turns are sent to the model (and hashed as cache key),
+# so prompt size stays flat as a conversation grows.
+HISTORY_WINDOW = 8
 
-@lru_cache(maxsize=100)
-def generate_response(prompt: str, conversation_history: tuple, skip_style: bool = False):
-    global LAST_REQUEST_TIME
 
-    current_time = time.time()
-    if current_time - LAST_REQUEST_TIME < MIN_REQUEST_INTERVAL:
-        time.sleep(MIN_REQUEST_INTERVAL - (current_time - LAST_REQUEST_TIME))
-    LAST_REQUEST_TIME = time.time()
+def _recent_history() -> tuple:
+    return tuple((m["role"], m["content"]) for m in st.session_state.messages[-HISTORY_WINDOW:])
 
-    retries = 3
-    backoff = 1
+
+def generate_response(prompt: str, conversation_history: tuple, skip_style: bool = False):
     # If we're explicitly in OFFLINE_MODE, return a friendly message immediately.
+    # This check stays outside the cache so toggling the mode takes effect.
     if st.session_state.get('OFFLINE_MODE', False):
         return "(OFFLINE MODE) The Dragon's LLM is currently unavailable — responses are disabled while offline."
+    key = (_history_key(prompt, conversation_history, loose=not skip_style), skip_style)
+    cached = _llm_replies().get(key)
+    if cached is not None:
+        return cached
+    try:
+        reply = _llm_response(conversation_history, skip_style)
+    except _LLMFailure as e:
+        return str(e)
+    _llm_replies().set(key, reply)
+    return reply
+
+
+class _LLMFailure(Exception):
+    """User-facing failure text, raised (not returned) so it is never cached."""
+
+
+# The response cache is keyed on the prompt and only the last few turns
+# (whitespace-normalized), so a repeated question in the same short context
+# hits even though the wider history window keeps changing.
+HISTORY_KEY_TURNS = 4
+
+
+@functools.lru_cache(maxsize=1024)
+def _normalize_for_key(text: str, loose: bool) -> str:
+    # Chat keys are loose (case and trailing "?.!" ignored); code prompts stay
+    # exact. Memoized: every key re-reads the last few turns, which earlier
+    # keys already normalized (in chat the prompt is itself the newest turn).
+    return vibe_utils.normalize_for_key(text, loose)
 
+
+def _history_key(prompt: str, conversation_history: tuple, loose: bool = False) -> str:
+    recent = [(role, _normalize_for_key(content, loose)) for role, content in conversation_history[-HISTORY_KEY_TURNS:]]
+    payload = json.dumps([_normalize_for_key(prompt, loose), recent], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _request_allowed() -> bool:
+    """Per-session token-bucket rate limit; never sleeps the script thread.
+
+    Returns False (and shows a notice) when this session's bucket is empty.
+    """
+    now = time.monotonic()
+    tokens, last = st.session_state.get("req_bucket", (float(REQUEST_BURST), now))
+    tokens = min(REQUEST_BURST, tokens + (now - last) / MIN_REQUEST_INTERVAL)
+    if tokens < 1:
+        st.session_state.req_bucket = (tokens, now)
+        st.warning("The dragon is catching its breath... try again in a moment 🐉")
+        return False
+    st.session_state.req_bucket = (tokens - 1, now)
+    return True
+
+
+def _compose_prompt(conversation_history: tuple, skip_style: bool = False):
+    """Return (gemini model, conversation prompt, full text prompt)."""
     # Compose the prompt. For code-generation flows we may skip the
     # stylized system prompt to avoid adding narrative text into code.
+    conversation_prompt = "Current conversation:\n" + "".join(
+        f"{role}: {content}\n" for role, content in conversation_history
+    ) + "assistant: "
+
+    # Gemini gets the style prompt as a system instruction on a cached model,
+    # so only the conversation is sent per turn; text-only backends need it
+    # prepended to the prompt instead.
+    model = gemini_model
     if skip_style:
-        full_prompt = f"Current conversation:\n"
+        full_prompt = conversation_prompt
     else:
-        full_prompt = f"{your_style_prompt}\n\nCurrent conversation:\n"
+        full_prompt = f"{your_style_prompt}\n\n{conversation_prompt}"
+        if gemini_model is not None:
+            model = _get_gemini_model(your_style_prompt)
+    return model, conversation_prompt, full_prompt
+
+
+# Appended when a stream breaks after some text has already been shown
+STREAM_INTERRUPTED = "\n\n*⚡ The dragon's reply was interrupted. Please ask again.*"
+
+
+# One reply cache shared across sessions by generate_response and
+# stream_response, so a question answered on either path is a hit on both.
+@st.cache_resource(show_spinner=False)
+def _llm_replies():
+    return vibe_utils.TTLCache(maxsize=256, ttl=3600)
+
+
+def _finished_normally(chunk) -> bool:
+    # Replies cut off by max tokens or safety filters end without an error,
+    # so only a final chunk that says STOP counts as complete.
+    try:
+        return chunk.candidates[0].finish_reason.name == "STOP"
+    except Exception:
+        return False
+
+
+def stream_response(prompt: str, conversation_history: tuple):
+    """Yield the chat reply in chunks as Gemini generates them.
+
+    Replies that stream to completion go into the same cache, under the same
+    key, as generate_response's. Falls back to the cached, non-streaming generate_response when
+    offline, when Gemini is not configured, or when the stream fails before
+    any text arrives (which also covers the Groq/OpenAI fallbacks). A stream
+    that fails partway ends with the STREAM_INTERRUPTED notice.
+    """
+    if st.session_state.get('OFFLINE_MODE', False) or gemini_model is None:
+        yield generate_response(prompt, conversation_history)
+        return
+
+    key = (_history_key(prompt, conversation_history, loose=True), False)
+    cached = _llm_replies().get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    model, conversation_prompt, _ = _compose_prompt(conversation_history)
+    produced = False
+    parts = []
+    chunk = None
+    deadline = time.monotonic() + LLM_TIMEOUT
+    try:
+        with _llm_slots():
+            for chunk in model.generate_content(conversation_prompt, stream=True,
+                                                request_options=LLM_REQUEST_OPTIONS):
+                try:
+                    text = chunk.text
+                except Exception:
+                    # chunks without text parts (e.g. safety metadata) raise here
+                    continue
+                if text:
+                    produced = True
+                    parts.append(text)
+                    yield text
+                if time.monotonic() > deadline:
+                    raise TimeoutError("stream exceeded LLM_TIMEOUT")
+        # Reached only when the stream ran to the end: errors, the deadline and
+        # a caller that stops iterating early all skip the write.
+        if produced and _finished_normally(chunk):
+            _llm_replies().set(key, "".join(parts))
+    except Exception:
+        if not produced:
+            yield generate_response(prompt, conversation_history)
+        else:
+            yield STREAM_INTERRUPTED
 
-    for role, content in conversation_history:
-        full_prompt += f"{role}: {content}\n"
-    full_prompt += f"assistant: "
+
+def _llm_response(conversation_history: tuple, skip_style: bool = False):
+    retries = 3
+    backoff = 1
+
+    model, conversation_prompt, full_prompt = _compose_prompt(conversation_history, skip_style)
 
     for _ in range(retries):
         # First, try Google Generative AI if it's available
-        if genai_available:
+        if model is not None:
             try:
-                try:
-                    from google.generativeai import GenerativeModel
-                except Exception as e:
-                    # Fall through to Groq if the import fails
-                    raise
-
-                model = GenerativeModel("gemini-2.0-flash")
-                response = model.generate_content(full_prompt)
+                with _llm_slots():
+                    response = model.generate_content(conversation_prompt, request_options=LLM_REQUEST_OPTIONS)
                 return getattr(response, 'text', str(response))
             except Exception as e:
                 # If Google fails for any reason, attempt Groq/OpenAI-compatible fallback
@@ -493,11 +558,11 @@ def generate_response(prompt: str, conversation_history: tuple, skip_style: bool
 
                 # If the error looks like rate limiting, back off and retry
                 if "RATE_LIMIT" in str(e) or "RATE_LIMIT_EXCEEDED" in str(e):
-                    time.sleep(backoff)
+                    time.sleep(random.uniform(0.5, backoff))
                     backoff *= 2
                     continue
                 # Otherwise return an informative error
-                return f"Dragon fire temporarily dimmed ⚡ Error: {str(e)} 🔥 Please try again when the flames reignite"
+                raise _LLMFailure(f"Dragon fire temporarily dimmed ⚡ Error: {str(e)} 🔥 Please try again when the flames reignite")
 
         else:
             # Google not available — try Groq/OpenAI-compatible client directly
@@ -507,33 +572,38 @@ def generate_response(prompt: str, conversation_history: tuple, skip_style: bool
                     return groq_text
                 else:
                     # Nothing returned, wait and retry
-                    time.sleep(backoff)
+                    time.sleep(random.uniform(0.5, backoff))
                     backoff *= 2
                     continue
             except Exception as e:
                 if "RATE_LIMIT" in str(e) or "RATE_LIMIT_EXCEEDED" in str(e):
-                    time.sleep(backoff)
+                    time.sleep(random.uniform(0.5, backoff))
                     backoff *= 2
                     continue
-                return f"Dragon fire temporarily dimmed ⚡ Error: {str(e)} 🔥 Please try again when the flames reignite"
+                raise _LLMFailure(f"Dragon fire temporarily dimmed ⚡ Error: {str(e)} 🔥 Please try again when the flames reignite")
 
-    return "The dragon's breath is too hot 🚦 Wait a little and try again ✨"
+    raise _LLMFailure("The dragon's breath is too hot 🚦 Wait a little and try again ✨")
 
 
 # --- AI Code Playground (3-column split) ---
+# The Monaco editor page lives in assets/monaco.html; it is read and compiled
+# once, and each rerun only substitutes the code and language.
+@st.cache_resource(show_spinner=False)
+def _monaco_template() -> string.Template:
+    return string.Template((Path(__file__).parent / "assets" / "monaco.html").read_text(encoding="utf-8"))
+
+
+def _js_string(s: str) -> str:
+    # A JSON string is a valid JS literal; escaping "<" keeps a "</script>"
+    # in the code from closing the page's script tag.
+    return json.dumps(s).replace("<", "\\u003c")
+
+
 st.markdown("""
 <h3 style="color:#ffa500; display:flex; align-items:center; margin-top:2rem; font-family: 'Cinzel Decorative', cursive;">🧪 AI Code Playground</h3>
 <p style="color:#ffd700;">Prompt the assistant to generate code, edit it in-place, run and preview the output, download or share a permalink.</p>
 """, unsafe_allow_html=True)
 
-# initialize playground session state
-if 'playground_prompt' not in st.session_state:
-    st.session_state.playground_prompt = ''
-if 'playground_code' not in st.session_state:
-    st.session_state.playground_code = ''
-if 'playground_lang' not in st.session_state:
-    st.session_state.playground_lang = 'html'
-
 # Load snippet from query param if present
 params = st.query_params
 if 'snippet' in params and params.get('snippet'):
@@ -554,7 +624,7 @@ left, mid, right = st.columns([2, 6, 5])
 with left:
     st.markdown('### Prompt & Chat')
     # show small chat history for context
-    if st.session_state.get('messages'):
+    if st.session_state.messages:
         for msg in st.session_state.messages[-6:]:
             role = msg.get('role')
             content = msg.get('content')
@@ -570,7 +640,7 @@ with left:
     with gen_col1:
         if st.button('Generate', key='playground_generate'):
             prompt_text = st.session_state.get('playground_prompt_input', '').strip()
-            if prompt_text:
+            if prompt_text and _request_allowed():
                 st.session_state.playground_prompt = prompt_text
                 # craft a language-aware instruction and explicitly pass language to the model
                 lang = st.session_state.get('playground_lang', 'html')
@@ -591,13 +661,11 @@ with left:
                     instruction = f"You are given the task: {prompt_text}\nReturn ONLY the requested source code for language: {lang}."
 
                 try:
-                    conv = tuple((m['role'], m['content']) for m in st.session_state.get('messages', []))
+                    conv = _recent_history()
                     gen = generate_response(instruction, conv, skip_style=True)
-                    import re, json
-
                     # Delegate processing of the generator output (sanitization + deterministic fallback)
                     try:
-                        sanitized = vibe_utils.process_generated_code(gen, prompt_text, lang=lang)
+                        sanitized = _process_generated_code(gen, prompt_text, lang)
                     except Exception:
                         sanitized = ''
 
@@ -648,44 +716,10 @@ with mid:
     try:
         code_initial = st.session_state.get('playground_textarea', '') or ''
         lang = st.session_state.get('playground_lang', 'python')
-        # Escape closing script tags and HTML-sensitive characters
-        def _escape_html(s: str) -> str:
-            return (s.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                        .replace('\u2028', '\\u2028').replace('\u2029', '\\u2029'))
-
-        escaped = _escape_html(code_initial)
-
-        monaco_html = f"""
-        <!doctype html>
-        <html>
-        <head>
-          <meta charset="utf-8" />
-          <meta name="viewport" content="width=device-width, initial-scale=1.0">
-          <style>
-            html, body, #editor {{ height: 100%; margin: 0; padding: 0; background: #0b0b0f; }}
-            .monaco-editor .margin, .monaco-editor .monaco-editor-background {{ background: #0b0b0f; }}
-          </style>
-        </head>
-        <body>
-        <div id="editor" style="height:100%; width:100%;"></div>
-        <script src="https://unpkg.com/monaco-editor@0.39.0/min/vs/loader.js"></script>
-        <script>
-        require.config({{ paths: {{ 'vs': 'https://unpkg.com/monaco-editor@0.39.0/min/vs' }} }});
-        require(['vs/editor/editor.main'], function() {{
-            var editor = monaco.editor.create(document.getElementById('editor'), {{
-                value: `{escaped}`,
-                language: '{'javascript' if lang=='javascript' else ('html' if lang=='html' else 'python')}',
-                theme: 'vs-dark',
-                automaticLayout: true,
-                minimap: {{ enabled: false }}
-            }});
-            // Expose a function to set the editor value from outside (useful when rerendered)
-            window.setEditorValue = function(val) {{ editor.setValue(val); }};
-        }});
-        </script>
-        </body>
-        </html>
-        """
+        monaco_html = _monaco_template().substitute(
+            value=_js_string(code_initial),
+            language='javascript' if lang == 'javascript' else ('html' if lang == 'html' else 'python'),
+        )
 
         components.html(monaco_html, height=520, scrolling=True)
         # Keep playground_code mirrored to the session state for execution/download
@@ -753,6 +787,38 @@ with right:
 
 
 # --- Dragon Tales Functions ---
+TALES_PAGE_SIZE = 20
+# Only the fields _tale_html renders are fetched from MongoDB.
+_TALE_FIELDS = {"title": 1, "content": 1, "author": 1, "rating": 1, "ratings_count": 1, "timestamp": 1}
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_tales(search_query: str, sort_by: str, min_rating: int, page: int, page_size: int = TALES_PAGE_SIZE):
+    """Return one page of tales from MongoDB; cleared whenever a tale changes."""
+    query = {}
+    if search_query:
+        query["$text"] = {"$search": search_query}
+
+    if min_rating > 0:
+        query["rating"] = {"$gte": min_rating}
+
+    if sort_by == "Relevance" and search_query:
+        # Let the text index rank matches instead of sorting them in memory
+        fields = dict(_TALE_FIELDS, score={"$meta": "textScore"})
+        cursor = tales_collection.find(query, fields).sort([("score", {"$meta": "textScore"})])
+    elif sort_by in ("Newest", "Relevance"):
+        cursor = tales_collection.find(query, _TALE_FIELDS).sort("timestamp", -1)
+    elif sort_by == "Top Rated":
+        cursor = tales_collection.find(query, _TALE_FIELDS).sort([("rating", -1), ("timestamp", -1)])
+    else:  # Oldest
+        cursor = tales_collection.find(query, _TALE_FIELDS).sort("timestamp", 1)
+    tales = list(cursor.skip(page * page_size).limit(page_size))
+    # Stringify ids once here so widget keys hash a short str, not an ObjectId
+    for tale in tales:
+        tale["_id"] = str(tale["_id"])
+    return tales
+
+
 def submit_tale(title, content, author="Anonymous Dragon"):
     """Submit a new dragon tale to the collection"""
     try:
@@ -766,11 +832,14 @@ def submit_tale(title, content, author="Anonymous Dragon"):
         }
         
         if tales_collection is not None:
+            # insert_one assigns an ObjectId _id
             tales_collection.insert_one(tale_data)
+            _fetch_tales.clear()
             st.success("Your tale has been added to the dragon's library! 📖")
             return True
         else:
-            st.session_state.setdefault('temp_tales', []).append(tale_data)
+            tale_data["_id"] = str(uuid.uuid4())
+            st.session_state.temp_tales.append(tale_data)
             st.warning("Tale saved temporarily (DB not connected)")
             return True
     except Exception as e:
@@ -781,13 +850,20 @@ def rate_tale(tale_id, rating):
     """Rate a dragon tale"""
     try:
         if tales_collection is not None:
-            tale = tales_collection.find_one({"_id": tale_id})
-            if tale:
-                new_rating = ((tale['rating'] * tale['ratings_count']) + rating) / (tale['ratings_count'] + 1)
-                tales_collection.update_one(
-                    {"_id": tale_id},
-                    {"$set": {"rating": new_rating}, "$inc": {"ratings_count": 1}}
-                )
+            # Fold the new rating into the running average server-side in a
+            # single atomic pipeline update (no read-modify-write race).
+            result = tales_collection.update_one(
+                {"_id": ObjectId(tale_id)},
+                [{"$set": {
+                    "rating": {"$divide": [
+                        {"$add": [{"$multiply": ["$rating", "$ratings_count"]}, rating]},
+                        {"$add": ["$ratings_count", 1]},
+                    ]},
+                    "ratings_count": {"$add": ["$ratings_count", 1]},
+                }}]
+            )
+            if result.matched_count:
+                _fetch_tales.clear()
                 st.toast("Your rating has been recorded! ⭐", icon="📜")
                 return True
         else:
@@ -810,44 +886,49 @@ def show_tale_modal():
                 st.session_state.show_tale_modal = False
                 st.rerun()
 
-def display_tale(tale, expanded=False):
-    """Display a dragon tale with rating options"""
-    with st.expander(f"📜 {tale['title']} by {tale.get('author', 'Anonymous Dragon')}", expanded=expanded):
-        st.markdown(f"""
-        <div class="dragon-card" style="padding:1.5rem; margin:1rem 0;">
-            <p style="color:#ffd700; font-size:1rem; white-space:pre-wrap;">{tale['content']}</p>
-            <div style="display:flex; justify-content:space-between; align-items:center; margin-top:1rem;">
-                <div>
-                    <span style="color:#ffa500;">Rating: </span>
-                    <span style="color:#ffd700;">{"⭐" * int(round(tale.get('rating', 0)))}</span>
-                    <span style="color:#ffa500; font-size:0.8rem;"> ({tale.get('ratings_count', 0)} ratings)</span>
-                </div>
-                <div>
-                    <span style="color:#ffa500; font-size:0.8rem;">
-                        {tale.get('timestamp', datetime.datetime.now()).strftime("%b %d, %Y")}
-                    </span>
-                </div>
-            </div>
+def _tale_html(tale) -> str:
+    """Render one tale as a collapsible HTML <details> card.
+
+    Title, author and content are user-submitted, so they are escaped
+    before going into markup rendered with unsafe_allow_html.
+    """
+    title = html.escape(str(tale['title']))
+    author = html.escape(str(tale.get('author', 'Anonymous Dragon')))
+    content = html.escape(str(tale['content']))
+    return f"""
+<details class="dragon-card" style="padding:1rem 1.5rem; margin:0.5rem 0;">
+    <summary style="color:#ffa500; cursor:pointer;">📜 {title} by {author}</summary>
+    <p style="color:#ffd700; font-size:1rem; white-space:pre-wrap;">{content}</p>
+    <div style="display:flex; justify-content:space-between; align-items:center; margin-top:1rem;">
+        <div>
+            <span style="color:#ffa500;">Rating: </span>
+            <span style="color:#ffd700;">{"⭐" * int(round(tale.get('rating', 0)))}</span>
+            <span style="color:#ffa500; font-size:0.8rem;"> ({tale.get('ratings_count', 0)} ratings)</span>
         </div>
-        """, unsafe_allow_html=True)
-        
-        # Rating buttons
-        cols = st.columns(5)
-        with cols[0]:
-            if st.button("⭐", key=f"rate1_{tale.get('_id', tale.get('title'))}"):
-                rate_tale(tale.get('_id', tale.get('title')), 1)
-        with cols[1]:
-            if st.button("⭐⭐", key=f"rate2_{tale.get('_id', tale.get('title'))}"):
-                rate_tale(tale.get('_id', tale.get('title')), 2)
-        with cols[2]:
-            if st.button("⭐⭐⭐", key=f"rate3_{tale.get('_id', tale.get('title'))}"):
-                rate_tale(tale.get('_id', tale.get('title')), 3)
-        with cols[3]:
-            if st.button("⭐⭐⭐⭐", key=f"rate4_{tale.get('_id', tale.get('title'))}"):
-                rate_tale(tale.get('_id', tale.get('title')), 4)
-        with cols[4]:
-            if st.button("⭐⭐⭐⭐⭐", key=f"rate5_{tale.get('_id', tale.get('title'))}"):
-                rate_tale(tale.get('_id', tale.get('title')), 5)
+        <div>
+            <span style="color:#ffa500; font-size:0.8rem;">
+                {tale.get('timestamp', datetime.datetime.now()).strftime("%b %d, %Y")}
+            </span>
+        </div>
+    </div>
+</details>"""
+
+
+def display_tales(tales, columns: int = 3):
+    """Display a page of tales: one markdown call for all cards, then a compact rating grid."""
+    st.markdown("\n".join(_tale_html(tale) for tale in tales), unsafe_allow_html=True)
+
+    st.markdown('<p style="color:#ffa500; margin-top:1rem;">Rate a tale</p>', unsafe_allow_html=True)
+    cols = st.columns(columns)
+    for i, tale in enumerate(tales):
+        with cols[i % columns]:
+            # A single star widget per tale; a rating is recorded once per session
+            tale_key = tale['_id']
+            st.caption(tale['title'])
+            stars = st.feedback("stars", key=f"rate_{tale_key}")
+            if stars is not None and not st.session_state.setdefault(f"rated_{tale_key}", False):
+                if rate_tale(tale_key, stars + 1):
+                    st.session_state[f"rated_{tale_key}"] = True
 
 # --- Enhanced Majestic Dragon Header ---
 st.markdown("""
@@ -883,69 +964,74 @@ st.markdown("""
 </p>
 """, unsafe_allow_html=True)
 
-# Search and filter controls
-col1, col2, col3 = st.columns([3, 2, 2])
-with col1:
-    search_query = st.text_input("Search tales", placeholder="Find tales of fire and code...")
-with col2:
-    sort_by = st.selectbox("Sort by", ["Newest", "Top Rated", "Oldest"])
-with col3:
-    min_rating = st.slider("Minimum rating", 0, 5, 0)
-
-# Add tale button
-if st.button("➕ Add Your Own Tale", key="add_tale_button"):
-    st.session_state.show_tale_modal = True
+# Tales are a fragment: searching, paging and rating rerun only this panel.
+@st.fragment
+def _tales_panel():
+    # Search and filter controls
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    with col1:
+        search_query = st.text_input("Search tales", placeholder="Find tales of fire and code...")
+    with col2:
+        sort_by = st.selectbox("Sort by", ["Newest", "Top Rated", "Oldest", "Relevance"])
+    with col3:
+        min_rating = st.slider("Minimum rating", 0, 5, 0)
+    with col4:
+        tales_page = int(st.number_input("Page", min_value=1, step=1)) - 1
+
+    # Add tale button
+    if st.button("➕ Add Your Own Tale", key="add_tale_button"):
+        st.session_state.show_tale_modal = True
+
+    # Show tale submission modal if triggered
+    if st.session_state.show_tale_modal:
+        show_tale_modal()
+
+    # Display tales
+    try:
+        if tales_collection is not None:
+            tales = _fetch_tales(search_query, sort_by, min_rating, tales_page)
+        else:
+            tales = st.session_state.temp_tales
+            if search_query:
+                tales = [t for t in tales if search_query.lower() in t['title'].lower() or search_query.lower() in t['content'].lower()]
+            if min_rating > 0:
+                tales = [t for t in tales if t.get('rating', 0) >= min_rating]
+            if sort_by in ("Newest", "Relevance"):
+                tales = sorted(tales, key=lambda x: x.get('timestamp', datetime.datetime.now()), reverse=True)
+            elif sort_by == "Top Rated":
+                tales = sorted(tales, key=lambda x: x.get('rating', 0), reverse=True)
+            else:  # Oldest
+                tales = sorted(tales, key=lambda x: x.get('timestamp', datetime.datetime.now()))
+            tales = tales[tales_page * TALES_PAGE_SIZE:(tales_page + 1) * TALES_PAGE_SIZE]
+
+        if not tales:
+            st.markdown("""
+            <div class="dragon-card" style="text-align:center; padding:2rem;">
+                <h4 style="color:#ffa500;">No tales found in the dragon's library yet!</h4>
+                <p style="color:#ffd700;">Be the first to share your story of code and magic...</p>
+                <span class="dragon-emoji" style="font-size:3rem;">📜</span>
+            </div>
+            """, unsafe_allow_html=True)
+        else:
+            display_tales(tales)
+            
+    except Exception as e:
+        st.error(f"The dragon's library is in disarray! {str(e)}")
 
-# Show tale submission modal if triggered
-if st.session_state.get('show_tale_modal', False):
-    show_tale_modal()
 
-# Display tales
-try:
-    if tales_collection is not None:
-        query = {}
-        if search_query:
-            query["$text"] = {"$search": search_query}
-        
-        if min_rating > 0:
-            query["rating"] = {"$gte": min_rating}
-        
-        if sort_by == "Newest":
-            tales = list(tales_collection.find(query).sort("timestamp", -1))
-        elif sort_by == "Top Rated":
-            tales = list(tales_collection.find(query).sort("rating", -1))
-        else:  # Oldest
-            tales = list(tales_collection.find(query).sort("timestamp", 1))
-    else:
-        tales = st.session_state.get('temp_tales', [])
-        if search_query:
-            tales = [t for t in tales if search_query.lower() in t['title'].lower() or search_query.lower() in t['content'].lower()]
-        if min_rating > 0:
-            tales = [t for t in tales if t.get('rating', 0) >= min_rating]
-        if sort_by == "Newest":
-            tales = sorted(tales, key=lambda x: x.get('timestamp', datetime.datetime.now()), reverse=True)
-        elif sort_by == "Top Rated":
-            tales = sorted(tales, key=lambda x: x.get('rating', 0), reverse=True)
-        else:  # Oldest
-            tales = sorted(tales, key=lambda x: x.get('timestamp', datetime.datetime.now()))
-    
-    if not tales:
-        st.markdown("""
-        <div class="dragon-card" style="text-align:center; padding:2rem;">
-            <h4 style="color:#ffa500;">No tales found in the dragon's library yet!</h4>
-            <p style="color:#ffd700;">Be the first to share your story of code and magic...</p>
-            <span class="dragon-emoji" style="font-size:3rem;">📜</span>
-        </div>
-        """, unsafe_allow_html=True)
-    else:
-        for tale in tales:
-            display_tale(tale)
-            
-except Exception as e:
-    st.error(f"The dragon's library is in disarray! {str(e)}")
+_tales_panel()
 
 # --- Dragon's Tavern Comment Section ---
-with st.sidebar:
+@st.cache_data(ttl=30, show_spinner=False)
+def _recent_comments(n: int = 10):
+    """Return the newest tavern comments; cleared whenever a comment is posted."""
+    return list(comments_collection.find({}, {"text": 1, "timestamp": 1, "user": 1, "_id": 0})
+                .sort("timestamp", -1).limit(n))
+
+
+# Posting a comment reruns only the tavern fragment, not the whole page.
+@st.fragment
+def _tavern_panel():
     st.markdown("""
     <h3 style="color:#ffa500; display:flex; align-items:center; font-family: 'Cinzel Decorative', cursive;">
         <span class="dragon-emoji" style="font-size:1.8rem">🍻</span>
@@ -972,9 +1058,10 @@ with st.sidebar:
                 
                 if comments_collection is not None:
                     comments_collection.insert_one(comment_data)
+                    _recent_comments.clear()
                     st.toast("Your voice echoes through the tavern!", icon="🍻")
                 else:
-                    st.session_state.setdefault('temp_comments', []).append({
+                    st.session_state.temp_comments.append({
                         "text": comment.strip(),
                         "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                         "user": "Anonymous Dragon"
@@ -993,9 +1080,9 @@ with st.sidebar:
     
     try:
         if comments_collection is not None:
-            recent_comments = list(comments_collection.find().sort("timestamp", -1).limit(10))
+            recent_comments = _recent_comments(10)
         else:
-            recent_comments = st.session_state.get('temp_comments', [])[-10:]
+            recent_comments = st.session_state.temp_comments[-10:]
             
         for comment in reversed(recent_comments):  # Show newest first
             timestamp = comment.get("timestamp")
@@ -1018,6 +1105,10 @@ with st.sidebar:
     
     st.markdown("</div>", unsafe_allow_html=True)
 
+
+with st.sidebar:
+    _tavern_panel()
+
 # --- Enhanced Dragon Profile ---
 st.markdown("""
 <div class="dragon-card">
@@ -1048,87 +1139,69 @@ st.markdown("""
 </h3>
 """, unsafe_allow_html=True)
 
-if "messages" not in st.session_state:
-    st.session_state.messages = [
-        {"role": "assistant", "content": "By the ancient fire of code dragons 🐉 I greet you, Developer! 🔥 What knowledge shall we forge today? 💻 #DragonWisdom"}
-    ]
-
-# Show chat messages
-for msg in st.session_state.messages:
-    avatar = None
-    with st.chat_message(msg["role"], avatar=avatar):
-        content = msg["content"]
-        for emoji_char in ["🐉", "🔥", "💻", "🏮", "✨", "⚔️", "🔒", "🤖", "🏆"]:
-            if emoji_char in content:
-                content = content.replace(emoji_char, f'<span class="{"dragon-emoji" if emoji_char in ["🐉","🔥","🏮","✨","⚔️","🏆"] else "code-emoji"}">{emoji_char}</span>')
-        st.markdown(content, unsafe_allow_html=True)
-
-
-
-# Chat input
-if prompt := st.chat_input("Speak your question to the dragon...", key="chat_input"):
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    with st.chat_message("user", avatar=None):
-        st.markdown(prompt, unsafe_allow_html=True)
+# The chat is a fragment so a new turn reruns only the conversation, not the
+# tales, tavern and other panels.
+@st.fragment
+def _chat_panel():
+    # Show chat messages
+    for msg in st.session_state.messages:
+        avatar = None
+        with st.chat_message(msg["role"], avatar=avatar):
+            st.markdown(msg["html"], unsafe_allow_html=True)
+
+
+
+    # Chat input
+    prompt = st.chat_input("Speak your question to the dragon...", key="chat_input")
+    if prompt and _request_allowed():
+        st.session_state.messages.append({"role": "user", "content": prompt,
+                                          "html": vibe_utils.format_emojis(prompt)})
+        with st.chat_message("user", avatar=None):
+            st.markdown(prompt, unsafe_allow_html=True)
     
-    conversation_history = tuple((msg["role"], msg["content"]) for msg in st.session_state.messages)
-
-    with st.spinner("Consulting the ancient dragon scrolls..."):
-        # Generate response
-        reply = generate_response(prompt, conversation_history)
+        conversation_history = _recent_history()
 
-        # If the reply looks like an error message from the LLM, show the Dragon Spell card
-        if any(token in reply for token in ["(LLM error)", "Dragon fire temporarily dimmed", "OFFLINE MODE", "Error:"]):
-            st.markdown(f"""
-            <div style="border:2px dashed #ff8c00; padding:16px; border-radius:12px; background:linear-gradient(90deg,#2a0000,#120200); color:#ffd700;">
-                <h3>Dragon Spell Failed 🔥</h3>
-                <p style="color:#ffb366;">The dragon's incantation could not be completed.</p>
-                <pre style="color:#ffd700; background:#1a0500; padding:12px; border-radius:8px;">{reply}</pre>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            # Stream the response word by word with typing effect
+        with st.spinner("Consulting the ancient dragon scrolls..."):
+            # Render the reply as the model streams it instead of replaying a
+            # finished reply word by word.
             response_container = st.empty()
-            full_response = ""
-            # Split reply into words but preserve emojis adjacent to words
-            words = []
-            current_word = ""
-            for char in reply:
-                if char.isspace():
-                    if current_word:
-                        words.append(current_word)
-                        current_word = ""
-                    words.append(char)
-                else:
-                    current_word += char
-            if current_word:
-                words.append(current_word)
-
-            # Display words one by one
-            for word in words:
-                full_response += word
-                time.sleep(0.05)  # Adjust speed as needed
+            reply = ""
+            formatted = ""
+            for chunk in stream_response(prompt, conversation_history):
+                reply += chunk
+                # Re-format the whole reply: an emoji's codepoints (e.g. a
+                # variation selector) can arrive split across two chunks.
+                formatted = vibe_utils.format_emojis(reply)
+                # The typing cue is a CSS caret animated in the browser; the
+                # server only pushes one update per received chunk.
+                response_container.markdown(formatted + '<span class="stream-caret"></span>', unsafe_allow_html=True)
+            response_container.markdown(formatted, unsafe_allow_html=True)
+
+            # If the reply looks like an error message from the LLM, show the Dragon Spell card
+            if any(token in reply for token in ["(LLM error)", "Dragon fire temporarily dimmed", "OFFLINE MODE", "Error:"]):
+                response_container.markdown(f"""
+                <div style="border:2px dashed #ff8c00; padding:16px; border-radius:12px; background:linear-gradient(90deg,#2a0000,#120200); color:#ffd700;">
+                    <h3>Dragon Spell Failed 🔥</h3>
+                    <p style="color:#ffb366;">The dragon's incantation could not be completed.</p>
+                    <pre style="color:#ffd700; background:#1a0500; padding:12px; border-radius:8px;">{reply}</pre>
+                </div>
+                """, unsafe_allow_html=True)
 
-                # Format the response with emoji effects
-                formatted_response = full_response
-                for emoji_char in ["🐉", "🔥", "💻", "🏮", "✨", "⚔️", "🔒", "🤖", "🏆"]:
-                    if emoji_char in formatted_response:
-                        formatted_response = formatted_response.replace(emoji_char, f'<span class="{"dragon-emoji" if emoji_char in ["🐉","🔥","🏮","✨","⚔️","🏆"] else "code-emoji"}">{emoji_char}</span>')
+        st.session_state.messages.append({"role": "assistant", "content": reply, "html": formatted})
 
-                response_container.markdown(formatted_response, unsafe_allow_html=True)
+        if collection is not None:
+            try:
+                _chat_log_queue(collection).put({
+                    "user": prompt,
+                    "bot": reply,
+                    "timestamp": _dt.datetime.now(_dt.timezone.utc),
+                    "session_id": st.session_state.get("session_id", "default")
+                })
+            except Exception as e:
+                st.warning(f"Dragon hoard inaccessible ⚠️ {str(e)}")
 
-    st.session_state.messages.append({"role": "assistant", "content": reply})
 
-    if collection is not None:
-        try:
-            collection.insert_one({
-                "user": prompt,
-                "bot": reply,
-                "timestamp": _dt.datetime.now(_dt.timezone.utc),
-                "session_id": st.session_state.get("session_id", "default")
-            })
-        except Exception as e:
-            st.warning(f"Dragon hoard inaccessible ⚠️ {str(e)}")
+_chat_panel()
 
 # --- Enhanced Dragon Footer ---
 st.markdown("""
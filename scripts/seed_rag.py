@@ -0,0 +1,42 @@
+"""Seed the RAG knowledge base once at deploy time.
+
+Usage:
+  python3 scripts/seed_rag.py knowledge.txt
+
+The file holds one document per paragraph (blank-line separated). Documents
+already in the Chroma store are skipped by content hash, so re-running the
+script only embeds new paragraphs. The app never seeds at startup.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from vibe.clients import create_rag_client  # noqa: E402
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python3 scripts/seed_rag.py <knowledge.txt>")
+        raise SystemExit(2)
+
+    text = Path(sys.argv[1]).read_text(encoding="utf-8")
+    docs = [" ".join(p.split()) for p in text.split("\n\n") if p.strip()]
+    if not docs:
+        print("No documents found")
+        raise SystemExit(1)
+
+    rag = create_rag_client(background=False)
+    if rag is None:
+        print("RAG backend unavailable (sentence-transformers / chromadb not installed?)")
+        raise SystemExit(1)
+
+    meta = [{"source": "seed", "type": "general"} for _ in docs]
+    if not rag.add_documents_bulk(docs, meta):
+        print("Seeding failed")
+        raise SystemExit(1)
+    print(f"Seeded {len(docs)} documents (existing ones skipped)")
+
+
+if __name__ == "__main__":
+    main()
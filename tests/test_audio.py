@@ -0,0 +1,6 @@
+from vibe.services.audio import clean_for_speech
+
+
+def test_clean_for_speech_keeps_line_breaks_as_word_breaks():
+    text = "**Steps:**\n- don't panic 🐉\n- line_two\tdone"
+    assert clean_for_speech(text) == "Steps: - don't panic - line two done"
@@ -0,0 +1,12 @@
+from vibe.context import _fetch_recent
+from vibe.db import _InMemoryCollection
+
+
+def test_fetch_recent_reads_in_memory_collections():
+    chats, comments = _InMemoryCollection(), _InMemoryCollection()
+    for i in range(5):
+        chats.insert_one({"user_prompt": f"q{i}", "dragon_response": f"a{i}", "timestamp": i})
+        comments.insert_one({"text": f"c{i}", "timestamp": i})
+    recent_chats, recent_comments = _fetch_recent(chats, comments)
+    assert [c["user_prompt"] for c in recent_chats] == ["q4", "q3", "q2"]
+    assert [c["text"] for c in recent_comments] == ["c4", "c3", "c2"]
@@ -0,0 +1,32 @@
+from vibe.services.rag import RAGClient
+
+
+def test_query_key_ignores_case_and_whitespace():
+    client = RAGClient()
+    assert client._key('Python is cool', 3) == client._key('  python  IS cool ', 3)
+    assert client._key('Python is cool', 3) != client._key('Python is cool', 5)
+
+
+class _FakeModel:
+    def encode(self, texts, **kwargs):
+        return [[float(len(t))] for t in texts]
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.upserted = []
+
+    def get(self, ids):
+        return {"ids": []}
+
+    def upsert(self, ids, **kwargs):
+        assert len(ids) == len(set(ids)), "duplicate ids in one upsert"
+        self.upserted.extend(ids)
+
+
+def test_bulk_add_skips_repeated_texts_in_one_batch():
+    client = RAGClient()
+    client._initialized = True
+    client._model, client._collection = _FakeModel(), _FakeCollection()
+    assert client.add_documents_bulk(["dragons hoard gold", "fire", "dragons hoard gold"])
+    assert len(client._collection.upserted) == 2
@@ -0,0 +1,49 @@
+import importlib.util
+from pathlib import Path
+
+# Load the utils module directly to avoid package-level side-effects during tests
+utils_path = Path(__file__).resolve().parents[1] / 'vibe' / 'utils.py'
+spec = importlib.util.spec_from_file_location('vibe_utils', str(utils_path))
+vu = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(vu)
+
+
+def test_format_emojis_wraps_each_theme_emoji():
+    out = vu.format_emojis('Fire 🔥 and code 💻 ⚔️')
+    assert '<span class="dragon-emoji">🔥</span>' in out
+    assert '<span class="code-emoji">💻</span>' in out
+    assert '<span class="dragon-emoji">⚔️</span>' in out
+
+
+def test_format_emojis_leaves_plain_text_untouched():
+    assert vu.format_emojis('no emojis here 💎') == 'no emojis here 💎'
+
+
+def test_pop_sentences_keeps_partial_tail_and_abbreviations():
+    sentences, rest = vu.pop_sentences('Pi is 3.14 exactly. Use tools, e.g. pytest! And then')
+    assert sentences == ['Pi is 3.14 exactly.', 'Use tools, e.g. pytest!']
+    assert rest == 'And then'
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = vu.TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'a' is now most recent
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = vu.TTLCache(maxsize=2, ttl=-1)
+    cache.set('a', 1)
+    assert cache.get('a') is None
+
+
+def test_loose_key_ignores_case_and_trailing_punctuation_only():
+    key = vu.normalize_for_key
+    assert key('How do I  sort a list?', True) == key('how do i sort a list', True)
+    assert key('a += 1', True) != key('a -= 1', True)
+    assert key('x > y', True) != key('x < y', True)
+    assert key('C++', True) != key('C#', True) != key('C', True)
@@ -1,3 +1,10 @@
-from .services.audio import init_audio, speak_text  # type: ignore
+from .services.audio import (  # type: ignore
+    StreamSpeaker,
+    init_audio,
+    interrupt_audio,
+    play_audio_bytes,
+    speak_text,
+    tts_bytes,
+)
 
-__all__ = ["init_audio", "speak_text"]
+__all__ = ["StreamSpeaker", "init_audio", "interrupt_audio", "play_audio_bytes", "speak_text", "tts_bytes"]
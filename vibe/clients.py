@@ -6,6 +6,7 @@ defensive (return None on missing config) and attempt lazy imports.
 """
 from typing import Optional
 import os
+import threading
 
 from .config import settings
 
@@ -16,10 +17,16 @@ def create_mongo_client() -> Optional[object]:
         return None
     try:
         from pymongo import MongoClient
-        client = MongoClient(uri, serverSelectionTimeoutMS=5000)
-        # validate connectivity
-        client.server_info()
-        return client
+        # PyMongo connects lazily; the caller's first operation surfaces an
+        # unreachable server, so no blocking server_info() ping here.
+        return MongoClient(
+            uri,
+            maxPoolSize=50,
+            minPoolSize=5,
+            maxIdleTimeMS=300000,
+            serverSelectionTimeoutMS=2000,
+            connectTimeoutMS=2000,
+        )
     except Exception:
         return None
 
@@ -113,6 +120,59 @@ def init_genai(api_key: str | None) -> bool:
         return False
 
 
+def create_gemini_model(api_key: str | None, model_name: str = "gemini-2.0-flash",
+                        system_instruction: str | None = None) -> Optional[object]:
+    """Configure google.generativeai and return a GenerativeModel, or None.
+
+    Callers are expected to hold on to the returned model (the app caches it
+    as a Streamlit resource) rather than rebuilding it per request. A stable
+    `system_instruction` is attached to the model so it does not need to be
+    repeated in every request's contents.
+    """
+    if not init_genai(api_key):
+        return None
+    try:
+        from google.generativeai import GenerativeModel
+        if system_instruction:
+            return GenerativeModel(model_name, system_instruction=system_instruction)
+        return GenerativeModel(model_name)
+    except Exception:
+        return None
+
+
+# The shared RAGClient. A failed load is not remembered: the next call
+# retries it (in the background, or synchronously when background=False).
+_rag_client = None
+_rag_lock = threading.Lock()
+
+
+def create_rag_client(background: bool = True) -> Optional[object]:
+    """Return the process-wide RAGClient, or None if unavailable.
+
+    Loading the embedding model and opening Chroma is expensive, so unlike
+    the other factories this one keeps a single instance that every caller
+    (and every Streamlit session) shares. By default the load starts on a
+    background thread and the client's methods wait for it on first use;
+    with background=False the load runs now and None means it failed.
+    """
+    global _rag_client
+    with _rag_lock:
+        rag = _rag_client
+        if rag is None:
+            try:
+                from .services.rag import RAGClient
+                rag = RAGClient(cache_folder=settings.MODEL_CACHE_PATH, chroma_path=settings.CHROMA_DB_PATH)
+            except Exception:
+                return None
+        if background:
+            # no-op while a load is running or once it has succeeded
+            rag.initialize_in_background()
+        elif not rag.initialize():
+            return None
+        _rag_client = rag
+        return rag
+
+
 def call_groq(prompt: str, model: str = None) -> Optional[str]:
     """Call Groq (or OpenAI-compatible endpoint provided in settings) and return text or None.
 
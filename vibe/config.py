@@ -20,6 +20,11 @@ class Settings:
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "openai/gpt-oss-20b")
     CHROMA_DB_PATH: str = os.getenv("CHROMA_DB_PATH", "./chroma_db")
     MODEL_CACHE_PATH: str = os.getenv("MODEL_CACHE_PATH", "./model_cache")
+    # Embedding backend for the RAG store: "onnx" (int8-quantized, CPU) or "torch"
+    RAG_BACKEND: str = os.getenv("RAG_BACKEND", "onnx")
+    RAG_ONNX_FILE: str = os.getenv("RAG_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+    # ONNX Runtime intra-op threads; 0 picks half the CPU count
+    RAG_ORT_THREADS: int = int(os.getenv("RAG_ORT_THREADS", "0"))
     STREAMLIT_SERVER_PORT: int = int(os.getenv("STREAMLIT_SERVER_PORT", "8501"))
     VOICE_AUTOPLAY: bool = os.getenv("VOICE_AUTOPLAY", "true").lower() in ("1", "true", "yes")
     # Default offline behavior; if true the app will start in offline mode unless overridden
@@ -5,10 +5,14 @@ RAG-only fallback response generation. It is intentionally dependency-light
 and takes the stateful objects (rag_system, db collections) as parameters so
 it can be imported without causing heavy imports at UI startup.
 """
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+import functools
 import datetime
 import time
 
+from .utils import TTLCache
+
 # --- Dragon style system prompt ---
 your_style_prompt = """
 You are the Dragon Developer's AI assistant - a mythical fusion of ancient wisdom and cutting-edge technology. Your responses should:
@@ -24,6 +28,90 @@ Example style:
 """
 
 
+# Recent chats and comments change slowly compared with chat turns, so one
+# fetch serves every prompt for RECENT_TTL seconds.
+RECENT_TTL = 30.0
+_recent_cache = TTLCache(maxsize=8, ttl=RECENT_TTL)
+# Longest a prompt waits on the recent-context reads once RAG is done
+RECENT_DEADLINE = 1.5
+
+
+@functools.lru_cache(maxsize=None)
+def _context_pool() -> ThreadPoolExecutor:
+    # Created on first use so importing this module starts no threads
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="dragon-context")
+
+
+_CHAT_FIELDS = {"user_prompt": 1, "dragon_response": 1, "_id": 0}
+_COMMENT_FIELDS = {"text": 1, "_id": 0}
+
+
+def _find_recent(collection, fields: dict, n: int) -> list:
+    if getattr(collection, "database", None) is None:
+        # vibe.db's in-memory fallback takes no projection argument
+        return list(collection.find().sort("timestamp", -1).limit(n))
+    return list(collection.find({}, fields).sort("timestamp", -1).limit(n))
+
+
+def _fetch_recent(chat_collection=None, comments_collection=None, n: int = 3) -> tuple:
+    """Return (recent_chats, recent_comments), newest first.
+
+    When both are pymongo collections in the same database the two top-n
+    reads go out as one aggregation ($unionWith, MongoDB 4.4+), i.e. one
+    round trip; otherwise each collection is read on its own.
+    """
+    chat_db = getattr(chat_collection, "database", None)
+    comments_db = getattr(comments_collection, "database", None)
+    if chat_db is None or comments_db is None or chat_db.name != comments_db.name:
+        chats = _find_recent(chat_collection, _CHAT_FIELDS, n) if chat_collection is not None else []
+        comments = _find_recent(comments_collection, _COMMENT_FIELDS, n) if comments_collection is not None else []
+        return chats, comments
+
+    pipeline = [
+        {"$sort": {"timestamp": -1}},
+        {"$limit": n},
+        {"$project": {**_CHAT_FIELDS, "kind": {"$literal": "chat"}}},
+        {"$unionWith": {"coll": comments_collection.name, "pipeline": [
+            {"$sort": {"timestamp": -1}},
+            {"$limit": n},
+            {"$project": {**_COMMENT_FIELDS, "kind": {"$literal": "comment"}}},
+        ]}},
+    ]
+    chats, comments = [], []
+    for doc in chat_collection.aggregate(pipeline):
+        (chats if doc.pop("kind") == "chat" else comments).append(doc)
+    return chats, comments
+
+
+def _recent_db_context(chat_collection=None, comments_collection=None) -> str:
+    """Recent conversations and Tavern comments as context blocks ("" when none)."""
+    key = (getattr(chat_collection, "full_name", None), getattr(comments_collection, "full_name", None))
+    cached = _recent_cache.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        recent_chats, recent_comments = _fetch_recent(chat_collection, comments_collection)
+    except Exception:
+        # Not cached: a brief Mongo error shouldn't hide recent context for RECENT_TTL
+        return ""
+
+    parts = []
+    if recent_chats:
+        parts.append("Recent conversations:\n" + "".join(
+            f"Q: {chat.get('user_prompt','')[:100]}...\nA: {chat.get('dragon_response','')[:100]}...\n\n"
+            for chat in recent_chats
+        ))
+    if recent_comments:
+        parts.append("Dragon's Tavern wisdom:\n" + "".join(
+            f"• {comment.get('text','')[:100]}...\n" for comment in recent_comments
+        ))
+
+    recent = "\n\n".join(parts)
+    _recent_cache.set(key, recent)
+    return recent
+
+
 def get_enhanced_rag_context(
     prompt: str,
     enable_rag: bool,
@@ -38,43 +126,35 @@ def get_enhanced_rag_context(
 
     Parameters are passed in so the caller (app.py) can keep ownership of
     heavy objects and the UI can control whether RAG is used.
+
+    `timeout` is accepted for existing callers but ignored: the RAG lookup
+    now runs inline and the Mongo reads are bounded by RECENT_DEADLINE.
     """
     if not enable_rag:
         return ""
 
     context_parts = []
 
+    # Start the Mongo reads first so they overlap the embedding + Chroma lookup
+    recent_future = None
+    if mongo_available:
+        recent_future = _context_pool().submit(_recent_db_context, chat_collection, comments_collection)
+
     # Knowledge base via rag_system
     if rag_available and rag_system is not None:
         try:
-            future = rag_system.get_rag_context_async(prompt)
-            rag_context = future.result(timeout=timeout)
+            rag_context = rag_system.get_rag_context(prompt)
             if rag_context:
                 context_parts.append(f"Knowledge Base: {rag_context}")
         except Exception:
             pass
 
-    # Recent chat conversations (DB)
-    if mongo_available and chat_collection is not None:
-        try:
-            recent_chats = list(chat_collection.find().sort("timestamp", -1).limit(3))
-            if recent_chats:
-                chat_context = "Recent conversations:\n"
-                for chat in recent_chats:
-                    chat_context += f"Q: {chat.get('user_prompt','')[:100]}...\nA: {chat.get('dragon_response','')[:100]}...\n\n"
-                context_parts.append(chat_context)
-        except Exception:
-            pass
-
-    # Tavern comments
-    if mongo_available and comments_collection is not None:
+    if recent_future is not None:
         try:
-            recent_comments = list(comments_collection.find().sort("timestamp", -1).limit(3))
-            if recent_comments:
-                tavern_context = "Dragon's Tavern wisdom:\n"
-                for comment in recent_comments:
-                    tavern_context += f"• {comment.get('text','')[:100]}...\n"
-                context_parts.append(tavern_context)
+            # A slow database only costs its context block, not the turn
+            recent = recent_future.result(timeout=RECENT_DEADLINE)
+            if recent:
+                context_parts.append(recent)
         except Exception:
             pass
 
@@ -95,7 +175,8 @@ def build_full_prompt(
     """Compose the full system+context+conversation prompt.
 
     This mirrors the previous in-app composition but is centralized here so
-    formatting and behavior are consistent.
+    formatting and behavior are consistent. `timeout` is kept for callers
+    and ignored (see get_enhanced_rag_context).
     """
     rag_context = get_enhanced_rag_context(
         prompt,
@@ -105,22 +186,20 @@ def build_full_prompt(
         mongo_available=mongo_available,
         chat_collection=chat_collection,
         comments_collection=comments_collection,
-        timeout=timeout,
     )
 
-    full_prompt = f"{your_style_prompt}\n\n"
+    parts = [f"{your_style_prompt}\n\n"]
     if rag_context:
-        full_prompt += f"{rag_context}\n\n"
-        full_prompt += (
+        parts.append(f"{rag_context}\n\n")
+        parts.append(
             "Use the above knowledge to provide accurate and helpful responses. "
             "If the knowledge doesn't contain relevant information, you can still provide general assistance.\n\n"
         )
 
-    full_prompt += "Current conversation:\n"
-    for role, content in conversation_history:
-        full_prompt += f"{role}: {content}\n"
-    full_prompt += "assistant: "
-    return full_prompt
+    parts.append("Current conversation:\n")
+    parts.extend(f"{role}: {content}\n" for role, content in conversation_history)
+    parts.append("assistant: ")
+    return "".join(parts)
 
 
 def generate_rag_only_response(
@@ -8,24 +8,32 @@ class MongoClientWrapper:
         self._client = None
         self._db = None
         self._collections = {}
-        self._available = False
+        # None = not probed yet; the client connects lazily and reachability
+        # is only checked on first use rather than blocking construction.
+        self._available = None if mongo_uri else False
         if mongo_uri:
             try:
                 from pymongo import MongoClient
-                self._client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
-                # trigger server selection
-                self._client.server_info()
+                self._client = MongoClient(mongo_uri, serverSelectionTimeoutMS=2000, connectTimeoutMS=2000)
                 self._db = self._client.get_database('vibemind_db')
+            except Exception:
+                self._available = False
+
+    def _probe(self) -> bool:
+        if self._available is None:
+            try:
+                self._client.admin.command("ping")
                 self._available = True
             except Exception:
                 self._available = False
+        return self._available
 
     def get_collection(self, name: str):
         """Return a collection-like object. If MongoDB is available, return the
         real pymongo collection. Otherwise return an in-memory collection wrapper
         that implements a minimal subset of the pymongo API used by the app.
         """
-        if self._available and self._db:
+        if self._probe() and self._db is not None:
             return self._db.get_collection(name)
 
         # fallback in-memory collection wrapper
@@ -34,7 +42,7 @@ class MongoClientWrapper:
         return self._collections[name]
 
     def available(self) -> bool:
-        return self._available
+        return self._probe()
 
 
 class _InMemoryCursor:
@@ -2,9 +2,15 @@
 
 Copy of original audio helper implementations.
 """
-import os
-import tempfile
-from gtts import gTTS
+import functools
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from ..utils import pop_sentences
 
 
 def _import_pygame():
@@ -15,7 +21,9 @@ def _import_pygame():
         return None
 
 
+@functools.lru_cache(maxsize=None)
 def init_audio() -> bool:
+    """Initialize the pygame mixer once per process; later calls are free."""
     pygame = _import_pygame()
     if not pygame:
         return False
@@ -26,22 +34,170 @@ def init_audio() -> bool:
         return False
 
 
-def speak_text(text: str, lang: str = "en", filename: str | None = None) -> str:
-    if not filename:
-        fd, filename = tempfile.mkstemp(prefix="vibemind_", suffix=".mp3")
-        os.close(fd)
+@functools.lru_cache(maxsize=256)
+def _cached_tts(text: str, lang: str) -> bytes:
+    from gtts import gTTS
+
+    buf = BytesIO()
+    gTTS(text=text, lang=lang).write_to_fp(buf)
+    return buf.getvalue()
+
+
+# Anything gTTS shouldn't read aloud: emojis, markdown/HTML punctuation, and
+# underscores (which \w would otherwise keep; str.isalnum() does not).
+# Whitespace, apostrophes and colons stay so words and clauses keep their shape.
+_CLEAN_RE = re.compile(r"[^\w\s.,!?:;'’-]|_")
+
+
+def clean_for_speech(text: str) -> str:
+    """Replace non-speakable characters with spaces, then collapse whitespace."""
+    return " ".join(_CLEAN_RE.sub(" ", text).split())
+
+
+def tts_bytes(text: str, lang: str = "en") -> bytes:
+    """Synthesize `text` with gTTS and return the MP3 bytes (no temp file).
+
+    Results are cached on the cleaned text, so the dragon's recurring
+    openers and error lines are only fetched from gTTS once.
+    """
+    return _cached_tts(clean_for_speech(text), lang)
+
+
+def _decode(audio: bytes):
+    """Decode MP3 bytes into a pygame Sound, or None when audio is unavailable."""
+    if not init_audio():
+        return None
+    try:
+        return _import_pygame().mixer.Sound(file=BytesIO(audio))
+    except Exception:
+        return None
 
-    tts = gTTS(text=text, lang=lang)
-    tts.save(filename)
 
+@functools.lru_cache(maxsize=None)
+def _speech_channel():
+    # Speech gets its own reserved channel so Channel.queue() can chain
+    # pre-decoded sentences back to back.
     pygame = _import_pygame()
-    if pygame:
+    pygame.mixer.set_reserved(1)
+    return pygame.mixer.Channel(0)
+
+
+def play_audio_bytes(audio: bytes) -> bool:
+    """Play MP3 bytes through pygame straight from memory."""
+    sound = _decode(audio)
+    if sound is None:
+        return False
+    _speech_channel().play(sound)
+    return True
+
+
+def speak_text(text: str, lang: str = "en", filename: str | None = None) -> str | None:
+    """Speak `text`; the MP3 is only written to disk when `filename` is given."""
+    audio = tts_bytes(text, lang=lang)
+    if filename:
+        with open(filename, "wb") as f:
+            f.write(audio)
+    play_audio_bytes(audio)
+    return filename
+
+
+# gTTS calls are HTTPS round trips; run several at once so later sentences
+# download while earlier ones play.
+_TTS_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="dragon-tts")
+
+
+class StreamSpeaker:
+    """Speak LLM output sentence by sentence while it is still streaming.
+
+    `feed()` each text chunk as it arrives; completed sentences are
+    synthesized concurrently on a shared pool and their futures queued in
+    order for the process-wide player thread, so the first sentence plays
+    while later ones are still being generated and downloaded. Call
+    `close()` at the end of the stream to speak any trailing text.
+    """
+
+    def __init__(self, lang: str = "en"):
+        self.lang = lang
+        self._buf = ""
+
+    def _enqueue(self, sentence: str):
+        future = _TTS_POOL.submit(tts_bytes, sentence, self.lang)
+        try:
+            _audio_queue().put(future, timeout=0.5)
+        except queue.Full:
+            # playback is far behind; drop this sentence rather than grow
+            future.cancel()
+
+    def feed(self, chunk: str):
+        sentences, self._buf = pop_sentences(self._buf + chunk)
+        for sentence in sentences:
+            self._enqueue(sentence)
+
+    def close(self):
+        if self._buf.strip():
+            self._enqueue(self._buf.strip())
+        self._buf = ""
+
+
+# Bumped by interrupt_audio(); a sentence dequeued before an interrupt is
+# dropped instead of played once it finishes synthesizing.
+_interrupts = 0
+
+
+def _play_forever(audio_queue: queue.Queue):
+    while True:
+        future = audio_queue.get()
+        generation = _interrupts
         try:
-            if not pygame.mixer.get_init():
-                pygame.mixer.init()
-            pygame.mixer.music.load(filename)
-            pygame.mixer.music.play()
+            audio = future.result()
         except Exception:
-            pass
+            continue
+        # Decode while the previous sentence is still playing, then hand the
+        # Sound to the channel's one-slot queue so playback is gapless.
+        sound = _decode(audio)
+        if sound is None:
+            continue
+        channel = _speech_channel()
+        while channel.get_queue() is not None and generation == _interrupts:
+            time.sleep(0.02)
+        if generation == _interrupts:
+            channel.queue(sound)
 
-    return filename
+
+# Bounded so a fast producer (or several quick chat turns) can't pile up
+# minutes of stale speech.
+AUDIO_QUEUE_SIZE = 8
+
+
+@functools.lru_cache(maxsize=None)
+def _audio_queue() -> queue.Queue:
+    """Return the shared playback queue, starting its consumer thread once."""
+    audio_queue: queue.Queue = queue.Queue(maxsize=AUDIO_QUEUE_SIZE)
+    threading.Thread(target=_play_forever, args=(audio_queue,), daemon=True, name="dragon-audio").start()
+    return audio_queue
+
+
+def interrupt_audio():
+    """Drop queued sentences and stop the current clip (e.g. on a new chat turn).
+
+    A no-op until something has been spoken: neither pygame nor the player
+    thread is loaded just to find nothing to stop.
+    """
+    global _interrupts
+    _interrupts += 1
+    if _audio_queue.cache_info().currsize:
+        audio_queue = _audio_queue()
+        with audio_queue.mutex:
+            for future in audio_queue.queue:
+                future.cancel()
+            audio_queue.queue.clear()
+            audio_queue.not_full.notify_all()
+    if not init_audio.cache_info().currsize:
+        return
+    pygame = _import_pygame()
+    if pygame and pygame.mixer.get_init():
+        try:
+            # stopping a channel also discards its queued Sound
+            _speech_channel().stop()
+        except Exception:
+            pass
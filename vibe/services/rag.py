@@ -3,32 +3,107 @@
 This file is a copy of the original `vibe/rag.py` to centralize service modules.
 """
 from typing import Optional, List, Dict
+import hashlib
+import os
+import threading
+
+from ..config import settings
+from ..utils import TTLCache
+
+
+# Queries whose embeddings are at least this similar share a cached context.
+SEMANTIC_THRESHOLD = 0.95
+SEMANTIC_CACHE_SIZE = 256
+# Characters of each document quoted in a context block
+PREVIEW_CHARS = 500
+# Longest a call blocks waiting for a background initialize()
+INIT_WAIT = 30.0
 
 
 class RAGClient:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2", cache_folder: str = "./model_cache", chroma_path: str = "./chroma_db"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", cache_folder: str = "./model_cache", chroma_path: str = "./chroma_db",
+                 backend: Optional[str] = None, onnx_file: Optional[str] = None):
         self.model_name = model_name
         self.cache_folder = cache_folder
         self.chroma_path = chroma_path
+        self.backend = backend or settings.RAG_BACKEND
+        self.onnx_file = onnx_file or settings.RAG_ONNX_FILE
         self._initialized = False
+        # Set while a background initialize() is running; see initialize_in_background
+        self._loading: Optional[threading.Event] = None
         self._model = None
         self._client = None
         self._collection = None
+        # Search results for repeated queries; cleared whenever documents change.
+        self._results = TTLCache(maxsize=512, ttl=600)
+        # Exact repeats of a prompt skip the encode as well as the search
+        self._contexts = TTLCache(maxsize=256, ttl=300)
+        # Folded into every cache key so swapping the embedding model or its
+        # weights never serves results computed with the old one.
+        self._fingerprint = f"{model_name}|{self.backend}|{self.onnx_file}"
+        # Semantic cache: recent normalized query embeddings and their contexts
+        self._sem_lock = threading.Lock()
+        self._sem_keys = None
+        self._sem_vals: List[str] = []
+        self._sem_n = None  # n_results each context was built with
+        self._sem_next = 0
+
+    def _invalidate(self):
+        """Drop cached results and contexts after the document set changes."""
+        self._results.clear()
+        self._contexts.clear()
+        with self._sem_lock:
+            self._sem_next = 0
+
+    def _key(self, query: str, n_results: Optional[int] = None) -> str:
+        """Cache key for a query: case/whitespace-normalized, hashed to a short digest."""
+        norm = " ".join(query.lower().split())
+        return hashlib.sha1(f"{self._fingerprint}|{norm}|{n_results}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _ort_session_options():
+        """Session options for batch-1 CPU inference: full graph optimizations
+        and intra-op threads sized to the machine (RAG_ORT_THREADS overrides;
+        set it to 1 when parallelizing across many small queries instead)."""
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        opts.intra_op_num_threads = settings.RAG_ORT_THREADS or max(1, (os.cpu_count() or 2) // 2)
+        return opts
+
+    def _load_model(self):
+        from sentence_transformers import SentenceTransformer
+
+        if self.backend == "onnx":
+            # int8-quantized ONNX weights run ~2-3x faster than FP32 torch on
+            # CPU; fall back to torch when onnxruntime or the file is missing.
+            try:
+                return SentenceTransformer(self.model_name, device="cpu", cache_folder=self.cache_folder,
+                                           backend="onnx", model_kwargs={
+                                               "file_name": self.onnx_file,
+                                               "provider": "CPUExecutionProvider",
+                                               "session_options": self._ort_session_options(),
+                                           })
+            except Exception:
+                pass
+        return SentenceTransformer(self.model_name, device="cpu", cache_folder=self.cache_folder)
 
     def initialize(self) -> bool:
         if self._initialized:
             return True
         try:
-            from sentence_transformers import SentenceTransformer
             import chromadb
             from chromadb.config import Settings
 
-            self._model = SentenceTransformer(self.model_name, device="cpu", cache_folder=self.cache_folder)
+            self._model = self._load_model()
             self._client = chromadb.PersistentClient(path=self.chroma_path, settings=Settings(anonymized_telemetry=False))
             try:
                 self._collection = self._client.get_collection("vibemind_knowledge")
             except Exception:
-                self._collection = self._client.create_collection("vibemind_knowledge")
+                # Embeddings are unit-normalized, so inner product == cosine
+                self._collection = self._client.create_collection("vibemind_knowledge", metadata={"hnsw:space": "ip"})
 
             self._initialized = True
             return True
@@ -36,30 +111,184 @@ class RAGClient:
             self._initialized = False
             return False
 
+    @staticmethod
+    def _doc_id(text: str) -> str:
+        # Stable content-hash ids make re-adding the same text an idempotent upsert
+        return "sha1_" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _with_preview(text: str, metadata: Optional[Dict]) -> Dict:
+        # Truncate once at ingest so building a context never slices documents
+        return {**(metadata or {}), "preview": text[:PREVIEW_CHARS]}
+
+    def initialize_in_background(self):
+        """Start initialize() on a daemon thread so model load overlaps page render.
+
+        Public methods wait (up to INIT_WAIT seconds) for it to finish the
+        first time they are actually called.
+        """
+        if self._initialized or self._loading is not None:
+            return
+        loading = threading.Event()
+        self._loading = loading
+
+        def _run():
+            try:
+                self.initialize()
+            finally:
+                if not self._initialized:
+                    # let the next initialize_in_background() retry the load
+                    self._loading = None
+                loading.set()
+
+        threading.Thread(target=_run, daemon=True, name="rag-init").start()
+
+    def _ready(self) -> bool:
+        loading = self._loading
+        if not self._initialized and loading is not None:
+            loading.wait(timeout=INIT_WAIT)
+        return self._initialized
+
     def add_document(self, text: str, metadata: Optional[Dict] = None) -> bool:
-        if not self._initialized:
+        if not self._ready():
             return False
         try:
-            emb = self._model.encode(text).tolist()
-            doc_id = f"doc_{int(__import__('time').time() * 1000)}"
-            self._collection.add(embeddings=[emb], documents=[text], metadatas=[metadata or {}], ids=[doc_id])
+            emb = self._model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
+            self._collection.upsert(ids=[self._doc_id(text)], embeddings=[emb], documents=[text],
+                                    metadatas=[self._with_preview(text, metadata)])
+            self._invalidate()
             return True
         except Exception:
             return False
 
+    def add_documents_bulk(self, texts: List[str], metadatas: Optional[List[Dict]] = None) -> bool:
+        """Embed many documents in one batched encode and store them with one upsert.
+
+        Texts already in the collection (by content hash) are skipped, so
+        re-seeding after a restart costs one id lookup instead of a re-embed.
+        """
+        if not self._ready() or not texts:
+            return False
+        try:
+            metadatas = [self._with_preview(t, md) for t, md in zip(texts, metadatas or [None] * len(texts))]
+            ids = [self._doc_id(t) for t in texts]
+            existing = set(self._collection.get(ids=ids)["ids"])
+            # Repeated texts share an id and Chroma rejects duplicate ids in
+            # one upsert, so keep only the first occurrence of each.
+            todo = []
+            for i, doc_id in enumerate(ids):
+                if doc_id not in existing:
+                    existing.add(doc_id)
+                    todo.append(i)
+            if not todo:
+                return True
+            embs = self._model.encode([texts[i] for i in todo], batch_size=32, convert_to_numpy=True,
+                                      normalize_embeddings=True)
+            self._collection.upsert(ids=[ids[i] for i in todo], embeddings=embs,
+                                    documents=[texts[i] for i in todo], metadatas=[metadatas[i] for i in todo])
+            self._invalidate()
+            return True
+        except Exception:
+            return False
+
+    def _query(self, emb, n_results: int) -> List[Dict]:
+        results = self._collection.query(query_embeddings=[emb], n_results=n_results)
+        documents = []
+        for i in range(len(results.get("documents", [[]])[0])):
+            documents.append({
+                "text": results["documents"][0][i],
+                "metadata": results.get("metadatas", [[]])[0][i],
+                "distance": results.get("distances", [[]])[0][i],
+            })
+        return documents
+
     def search(self, query: str, n_results: int = 3) -> List[Dict]:
-        if not self._initialized:
+        if not self._ready():
             return []
+        key = self._key(query, n_results)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
         try:
-            emb = self._model.encode(query).tolist()
-            results = self._collection.query(query_embeddings=[emb], n_results=n_results)
-            documents = []
-            for i in range(len(results.get("documents", [[]])[0])):
-                documents.append({
-                    "text": results["documents"][0][i],
-                    "metadata": results.get("metadatas", [[]])[0][i],
-                    "distance": results.get("distances", [[]])[0][i],
-                })
+            emb = self._model.encode(query, convert_to_numpy=True, normalize_embeddings=True)
+            documents = self._query(emb, n_results)
+            self._results.set(key, documents)
             return documents
         except Exception:
             return []
+
+    def search_many(self, queries: List[str], n_results: int = 3) -> List[List[Dict]]:
+        """Search several queries with one batched encode and one Chroma query."""
+        if not self._ready() or not queries:
+            return [[] for _ in queries]
+        try:
+            embs = self._model.encode(queries, batch_size=16, convert_to_numpy=True, normalize_embeddings=True)
+            results = self._collection.query(query_embeddings=embs, n_results=n_results)
+            docs = results.get("documents") or []
+            metas = results.get("metadatas") or [[] for _ in docs]
+            dists = results.get("distances") or [[] for _ in docs]
+            return [
+                [{"text": d, "metadata": m, "distance": dist} for d, m, dist in zip(row_docs, row_metas, row_dists)]
+                for row_docs, row_metas, row_dists in zip(docs, metas, dists)
+            ]
+        except Exception:
+            return [[] for _ in queries]
+
+    def _semantic_lookup(self, qv, n_results: int) -> Optional[str]:
+        import numpy as np
+
+        with self._sem_lock:
+            filled = min(self._sem_next, SEMANTIC_CACHE_SIZE)
+            if not filled:
+                return None
+            # only contexts built with the same n_results are candidates
+            sims = np.where(self._sem_n[:filled] == n_results, self._sem_keys[:filled] @ qv, -1.0)
+            best = int(sims.argmax())
+            return self._sem_vals[best] if sims[best] >= SEMANTIC_THRESHOLD else None
+
+    def _semantic_store(self, qv, n_results: int, context: str):
+        import numpy as np
+
+        with self._sem_lock:
+            if self._sem_keys is None:
+                self._sem_keys = np.zeros((SEMANTIC_CACHE_SIZE, qv.shape[0]), dtype=qv.dtype)
+                self._sem_vals = [""] * SEMANTIC_CACHE_SIZE
+                self._sem_n = np.zeros(SEMANTIC_CACHE_SIZE, dtype=np.int32)
+            # ring buffer: once full, the oldest row is overwritten
+            slot = self._sem_next % SEMANTIC_CACHE_SIZE
+            self._sem_keys[slot] = qv
+            self._sem_vals[slot] = context
+            self._sem_n[slot] = n_results
+            self._sem_next += 1
+
+    def get_rag_context(self, query: str, n_results: int = 3) -> str:
+        """Return the knowledge-base context block for a prompt ("" when none).
+
+        Paraphrases of a recently answered query (cosine >= SEMANTIC_THRESHOLD)
+        are served from the semantic cache with one dot product instead of a
+        Chroma search; exact (normalized) repeats skip the encode too.
+        """
+        if not self._ready():
+            return ""
+        key = self._key(query, n_results)
+        cached = self._contexts.get(key)
+        if cached is not None:
+            return cached
+        try:
+            qv = self._model.encode(query, convert_to_numpy=True, normalize_embeddings=True)
+            cached = self._semantic_lookup(qv, n_results)
+            if cached is not None:
+                self._contexts.set(key, cached)
+                return cached
+            documents = self._query(qv, n_results)
+            context = ""
+            if documents:
+                context = "Relevant knowledge from the dragon's library:\n\n" + "".join(
+                    f"{i}. {(doc['metadata'] or {}).get('preview') or doc['text'][:PREVIEW_CHARS]}...\n\n"
+                    for i, doc in enumerate(documents, 1)
+                )
+            self._semantic_store(qv, n_results, context)
+            self._contexts.set(key, context)
+            return context
+        except Exception:
+            return ""
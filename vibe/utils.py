@@ -1,7 +1,11 @@
-"""Utility helpers: config path, persisted state helpers, and datetime helpers."""
+"""Utility helpers: config path, persisted state helpers, datetime helpers and a small TTL cache."""
+from collections import OrderedDict
 from pathlib import Path
 import json
 import datetime as _dt
+import re
+import threading
+import time
 import uuid
 
 
@@ -37,6 +41,97 @@ def now_utc() -> _dt.datetime:
     return _dt.datetime.now(_dt.timezone.utc)
 
 
+class TTLCache:
+    """Small thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            stored_at, value = item
+            if time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Theme emojis and the CSS class that animates them in chat messages.
+EMOJI_CLASSES = {
+    "🐉": "dragon-emoji",
+    "🔥": "dragon-emoji",
+    "💻": "code-emoji",
+    "🏮": "dragon-emoji",
+    "✨": "dragon-emoji",
+    "⚔️": "dragon-emoji",
+    "🔒": "code-emoji",
+    "🤖": "code-emoji",
+    "🏆": "dragon-emoji",
+}
+_EMOJI_RE = re.compile("|".join(re.escape(e) for e in EMOJI_CLASSES))
+
+
+def format_emojis(text: str) -> str:
+    """Wrap theme emojis in their animated <span> classes in a single pass."""
+    return _EMOJI_RE.sub(lambda m: f'<span class="{EMOJI_CLASSES[m.group(0)]}">{m.group(0)}</span>', text)
+
+
+# Sentence terminator (plus any closing quotes/brackets) followed by whitespace;
+# decimals like 3.14 never match because no whitespace follows the dot.
+_SENTENCE_END_RE = re.compile(r'[.!?]+["\')\]]*\s+')
+_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "st", "vs", "etc", "e.g", "i.e"}
+
+
+def pop_sentences(text: str) -> tuple[list[str], str]:
+    """Split the complete sentences off a streaming text buffer.
+
+    Returns (sentences, remainder); the remainder is the trailing partial
+    sentence to keep buffering until more text (or end of stream) arrives.
+    """
+    sentences = []
+    start = 0
+    for m in _SENTENCE_END_RE.finditer(text):
+        candidate = text[start:m.end()].strip()
+        last_word = candidate.rsplit(None, 1)[-1].rstrip('.!?"\')]').lower()
+        if m.group(0).startswith('.') and last_word in _ABBREVIATIONS:
+            continue
+        sentences.append(candidate)
+        start = m.end()
+    return sentences, text[start:]
+
+
+def normalize_for_key(text: str, loose: bool = False) -> str:
+    """Normalize a prompt for use in a response cache key.
+
+    Whitespace is always collapsed. Loose keys also casefold and drop
+    trailing sentence punctuation, so "How do I sort a list?" and "how do i
+    sort a list" match, while operators and symbols ("a += 1" vs "a -= 1",
+    "C++" vs "C#") still tell prompts apart.
+    """
+    text = " ".join(text.split())
+    if loose:
+        text = text.casefold().rstrip("?.! ")
+    return text
+
+
 def snippets_file() -> Path:
     """Return path to the persisted playground snippets JSON file."""
     p = config_dir() / "playground_snippets.json"